@@ -1,11 +1,25 @@
 """AI modules for SmartSales AI."""
 
-from .llm_insights import SalesInsightsGenerator, SalesInsight
-from .anomaly_detector import AnomalyDetector, AnomalyReport
+import importlib
+
+# Exports load on first access, so importing a light submodule such as
+# ai._kernels does not pull in LangChain
+_EXPORTS = {
+    "SalesInsightsGenerator": ".llm_insights",
+    "SalesInsight": ".llm_insights",
+    "AnomalyDetector": ".anomaly_detector",
+    "AnomalyReport": ".anomaly_detector",
+}
 
 __all__ = [
     "SalesInsightsGenerator",
     "SalesInsight",
-    "AnomalyDetector", 
+    "AnomalyDetector",
     "AnomalyReport"
 ]
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
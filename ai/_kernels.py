@@ -0,0 +1,99 @@
+"""
+Compiled kernels for batch anomaly scans and revenue group-sums.
+
+The kernels are JIT-compiled with Numba when it is installed. Without
+Numba, an equivalent vectorized NumPy implementation is used instead,
+so results are identical either way.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+
+def _scan_batch_numpy(values, means, stds, q1s, q3s, iqr_mult, z_thr):
+    """Vectorized NumPy fallback for `scan_batch`."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z_scores = np.where(stds > 0, np.abs(values - means) / stds, 0.0)
+    iqr = q3s - q1s
+    z_mask = z_scores > z_thr
+    iqr_mask = (values < q1s - iqr_mult * iqr) | (values > q3s + iqr_mult * iqr)
+    return z_mask, iqr_mask, z_scores
+
+
+def _group_sums_numpy(cat_codes, store_codes, date_codes, values, n_cats, n_stores, n_dates):
+    """Vectorized NumPy fallback for `group_sums`."""
+    finite = ~np.isnan(values)
+    sums = []
+    for codes, n in ((cat_codes, n_cats), (store_codes, n_stores), (date_codes, n_dates)):
+        keep = finite & (codes >= 0)
+        sums.append(np.bincount(codes[keep], weights=values[keep], minlength=n))
+    return tuple(sums)
+
+
+if HAS_NUMBA:
+    # No fastmath: metrics without enough history carry NaN stats, and
+    # fastmath is allowed to assume NaNs never occur.
+    @njit(cache=True)
+    def scan_batch(values, means, stds, q1s, q3s, iqr_mult, z_thr):
+        """
+        Flag Z-score and IQR outliers for many metrics in one pass.
+        
+        All array arguments are float64 and aligned by metric. Metrics
+        with NaN stats are never flagged.
+        
+        Returns:
+            Tuple of (z_mask, iqr_mask, z_scores) arrays
+        """
+        n = values.shape[0]
+        z_mask = np.zeros(n, dtype=np.bool_)
+        iqr_mask = np.zeros(n, dtype=np.bool_)
+        z_scores = np.zeros(n, dtype=np.float64)
+        
+        for i in range(n):
+            if stds[i] > 0:
+                z = abs(values[i] - means[i]) / stds[i]
+                z_scores[i] = z
+                z_mask[i] = z > z_thr
+            iqr = q3s[i] - q1s[i]
+            iqr_mask[i] = (
+                values[i] < q1s[i] - iqr_mult * iqr
+                or values[i] > q3s[i] + iqr_mult * iqr
+            )
+        
+        return z_mask, iqr_mask, z_scores
+    
+    @njit(cache=True)
+    def group_sums(cat_codes, store_codes, date_codes, values, n_cats, n_stores, n_dates):
+        """
+        Sum values per category, store and date in one pass.
+        
+        Codes are factorized keys (-1 for missing); rows with a missing
+        key or a NaN value are skipped for that key. Sums accumulate in
+        float64 whatever the dtype of `values`.
+        
+        Returns:
+            Tuple of (by_cat, by_store, by_date) float64 arrays
+        """
+        by_cat = np.zeros(n_cats)
+        by_store = np.zeros(n_stores)
+        by_date = np.zeros(n_dates)
+        # Serial on purpose: a prange loop would race on the output slots
+        for i in range(values.size):
+            v = values[i]
+            if v != v:
+                continue
+            if cat_codes[i] >= 0:
+                by_cat[cat_codes[i]] += v
+            if store_codes[i] >= 0:
+                by_store[store_codes[i]] += v
+            if date_codes[i] >= 0:
+                by_date[date_codes[i]] += v
+        return by_cat, by_store, by_date
+else:
+    scan_batch = _scan_batch_numpy
+    group_sums = _group_sums_numpy
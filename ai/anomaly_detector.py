@@ -14,12 +14,36 @@ Usage:
     anomalies = detector.detect(sales_df)
 """
 
+import math
 import numpy as np
 from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, NamedTuple, Sequence, Tuple, Optional, Union
 from dataclasses import dataclass
 
 
+_QUARTILE_POS = np.array([0.25, 0.5, 0.75])
+
+# Severity is the number of edges a score strictly exceeds
+_SEV_EDGES = np.array([3.0, 4.0, 5.0])
+_SEV_LABELS = ("low", "medium", "high", "critical")
+
+_EMOJI_MAP = {
+    "critical": "🚨",
+    "high": "⚠️",
+    "medium": "📊",
+    "low": "ℹ️"
+}
+
+_RECOMMENDATIONS = {
+    "daily_revenue": "Revenue {direction}d by {pct:.1f}%. Review pricing strategy and promotions.",
+    "transaction_count": "Transaction volume {direction}d by {pct:.1f}%. Check store traffic and marketing campaigns.",
+    "avg_order_value": "Average order value {direction}d by {pct:.1f}%. Analyze product mix and upselling effectiveness.",
+    "category_sales": "Category sales {direction}d by {pct:.1f}%. Review inventory levels and merchandising.",
+}
+
+_DEFAULT_RECOMMENDATION = "Unusual {direction} of {pct:.1f}% detected. Investigate root cause."
+
+
 @dataclass
 class AnomalyReport:
     """Structured anomaly detection result."""
@@ -33,6 +57,117 @@ class AnomalyReport:
     recommendation: str
 
 
+class _MetricStats(NamedTuple):
+    """Baseline statistics for a metric, computed once per history update."""
+    mean: float
+    std: float
+    q1: float
+    median: float
+    q3: float
+    iqr: float
+    lower: float
+    upper: float
+    two_std_lo: float
+    two_std_hi: float
+
+
+def _quartiles(arr: np.ndarray) -> Tuple[float, float, float]:
+    """
+    Q1, median and Q3 of a 1-D array, using linear interpolation.
+    
+    Matches np.percentile's default method, but uses np.partition to
+    select only the few order statistics needed instead of sorting.
+    """
+    pos = _QUARTILE_POS * (arr.size - 1)
+    lo = pos.astype(np.intp)
+    hi = np.minimum(lo + 1, arr.size - 1)
+    part = np.partition(arr, np.union1d(lo, hi))
+    q = part[lo] + (pos - lo) * (part[hi] - part[lo])
+    return float(q[0]), float(q[1]), float(q[2])
+
+
+def _pct_deviation(value: float, reference: float) -> float:
+    """
+    Percent deviation of `value` from `reference`.
+    
+    A zero reference yields +/-inf (or NaN when value is also zero), as
+    NumPy float division does, instead of raising ZeroDivisionError for
+    metrics centred on zero.
+    """
+    diff = value - reference
+    if reference == 0:
+        return math.copysign(math.inf, diff) if diff != 0 else math.nan
+    return (diff / reference) * 100
+
+
+class _PercentileSketch:
+    """
+    Fixed-size equal-width histogram for approximate streaming quantiles.
+    
+    Updates are O(log B) and quantile lookups O(B) for B bins, with
+    memory independent of stream length. When a value falls outside the
+    current range, the range doubles towards it and adjacent bins are
+    merged, so the bin count never changes. Non-finite values are ignored:
+    an infinity would grow the range without bound.
+    """
+    
+    def __init__(self, lo: float, hi: float, bins: int = 256):
+        if bins < 2 or bins % 2:
+            raise ValueError("bins must be an even number >= 2")
+        if hi <= lo:
+            hi = lo + max(abs(lo), 1.0)
+        self.lo = float(lo)
+        self.hi = float(hi)
+        self.n_bins = bins
+        self.bins = np.zeros(bins, dtype=np.int64)
+        self.edges = np.linspace(self.lo, self.hi, bins + 1)
+    
+    @classmethod
+    def from_values(cls, values: Sequence[float], bins: int = 256) -> "_PercentileSketch":
+        """Create a sketch spanning the given (finite) values and add them all."""
+        arr = np.asarray(values, dtype=np.float64)
+        arr = arr[np.isfinite(arr)]
+        if not arr.size:
+            return cls(0.0, 1.0, bins)
+        sketch = cls(float(arr.min()), float(arr.max()), bins)
+        idx = np.searchsorted(sketch.edges, arr, side="right") - 1
+        np.add.at(sketch.bins, np.minimum(idx, bins - 1), 1)
+        return sketch
+    
+    def update(self, x: float):
+        """Add a single observation; NaN and +/-inf are skipped."""
+        if not math.isfinite(x):
+            return
+        while x < self.lo or x > self.hi:
+            self._grow(below=x < self.lo)
+        i = int(np.searchsorted(self.edges, x, side="right")) - 1
+        self.bins[min(i, self.n_bins - 1)] += 1
+    
+    def _grow(self, below: bool):
+        """Double the covered range, merging bins pairwise."""
+        width = self.hi - self.lo
+        merged = self.bins.reshape(-1, 2).sum(axis=1)
+        empty = np.zeros(self.n_bins // 2, dtype=np.int64)
+        if below:
+            self.bins = np.concatenate([empty, merged])
+            self.lo -= width
+        else:
+            self.bins = np.concatenate([merged, empty])
+            self.hi += width
+        self.edges = np.linspace(self.lo, self.hi, self.n_bins + 1)
+    
+    def quantile(self, p: Union[float, Sequence[float]]) -> Union[float, np.ndarray]:
+        """Approximate quantile(s) for p in [0, 1], interpolated within a bin."""
+        cum = np.cumsum(self.bins)
+        target = np.clip(np.asarray(p, dtype=np.float64), 0.0, 1.0) * cum[-1]
+        i = np.minimum(np.searchsorted(cum, target, side="left"), self.n_bins - 1)
+        prev = np.where(i > 0, cum[i - 1], 0)
+        count = np.maximum(self.bins[i], 1)
+        frac = np.clip((target - prev) / count, 0.0, 1.0)
+        result = self.edges[i] + frac * (self.edges[i + 1] - self.edges[i])
+        return float(result) if result.ndim == 0 else result
+
+
 class AnomalyDetector:
     """
     Multi-method anomaly detection for retail analytics.
@@ -45,7 +180,8 @@ class AnomalyDetector:
         self,
         z_threshold: float = 3.0,
         iqr_multiplier: float = 1.5,
-        sensitivity: str = "medium"
+        sensitivity: str = "medium",
+        sketch_bins: int = 256
     ):
         """
         Initialize the anomaly detector.
@@ -54,9 +190,11 @@ class AnomalyDetector:
             z_threshold: Z-score threshold for anomaly detection
             iqr_multiplier: IQR multiplier for outlier detection
             sensitivity: Detection sensitivity (low, medium, high)
+            sketch_bins: Histogram bins per metric for streaming IQR bounds
         """
         self.z_threshold = z_threshold
         self.iqr_multiplier = iqr_multiplier
+        self.sketch_bins = sketch_bins
         
         # Adjust thresholds based on sensitivity
         sensitivity_map = {"low": 0.7, "medium": 1.0, "high": 1.3}
@@ -64,23 +202,141 @@ class AnomalyDetector:
         self.z_threshold *= multiplier
         self.iqr_multiplier *= multiplier
         
-        self.historical_data: Dict[str, List[float]] = {}
+        self.historical_data: Dict[str, np.ndarray] = {}
+        self._stats_cache: Dict[str, Optional[_MetricStats]] = {}
+        # Streaming state: Welford [n, mean, M2] and a quantile sketch
+        self._running: Dict[str, List[float]] = {}
+        self._sketches: Dict[str, _PercentileSketch] = {}
     
     def add_historical_data(self, metric: str, values: List[float]):
         """
         Add historical data for a metric to improve detection.
         
+        Baseline statistics are computed here once, so detection
+        calls only do scalar comparisons.
+        
         Args:
             metric: Name of the metric (e.g., 'daily_revenue')
             values: Historical values for baseline
         """
-        self.historical_data[metric] = values
+        # Stored as a contiguous float64 array so reductions never re-convert it
+        arr = np.ascontiguousarray(values, dtype=np.float64)
+        self.historical_data[metric] = arr
+        self._stats_cache[metric] = self._compute_stats(arr)
+        
+        # Seed the streaming state so update_historical continues from here;
+        # like update_historical, it only takes finite values
+        finite = arr[np.isfinite(arr)]
+        mean = float(finite.mean()) if finite.size else 0.0
+        self._running[metric] = [finite.size, mean, float(((finite - mean) ** 2).sum())]
+        if finite.size:
+            self._sketches[metric] = _PercentileSketch.from_values(finite, self.sketch_bins)
+        else:
+            self._sketches.pop(metric, None)
+    
+    def update_historical(self, metric: str, value: float):
+        """
+        Append a single observation to a metric's history.
+        
+        Mean and standard deviation are updated in O(1) with Welford's
+        algorithm; IQR bounds come from a fixed-size percentile sketch,
+        so memory stays constant however long the stream runs.
+        
+        NaN and +/-inf are ignored, so one bad reading cannot poison the
+        running stats for good.
+        
+        Args:
+            metric: Name of the metric
+            value: Newly observed value
+        """
+        if not math.isfinite(value):
+            return
+        
+        running = self._running.setdefault(metric, [0, 0.0, 0.0])
+        running[0] += 1
+        delta = value - running[1]
+        running[1] += delta / running[0]
+        running[2] += delta * (value - running[1])
+        
+        sketch = self._sketches.get(metric)
+        if sketch is None:
+            self._sketches[metric] = _PercentileSketch.from_values([value], self.sketch_bins)
+        else:
+            sketch.update(value)
+        
+        # Invalidate; stats are rebuilt lazily on the next detection call
+        self._stats_cache.pop(metric, None)
+    
+    def _compute_stats(self, values: Sequence[float]) -> Optional[_MetricStats]:
+        """Compute baseline statistics, or None if there is not enough data."""
+        if len(values) < 10:
+            return None
+        
+        arr = np.asarray(values, dtype=np.float64)
+        q1, median, q3 = _quartiles(arr)
+        return self._build_stats(float(arr.mean()), float(arr.std()), q1, median, q3)
+    
+    def _compute_running_stats(self, metric: str) -> Optional[_MetricStats]:
+        """Build stats from the Welford state and the quantile sketch."""
+        n, mean, m2 = self._running[metric]
+        if n < 10:
+            return None
+        
+        # Population std, matching np.std used for batch history
+        std = math.sqrt(m2 / n)
+        q1, median, q3 = self._sketches[metric].quantile([0.25, 0.5, 0.75])
+        return self._build_stats(mean, std, q1, median, q3)
+    
+    def _build_stats(
+        self,
+        mean: float,
+        std: float,
+        q1: float,
+        median: float,
+        q3: float
+    ) -> _MetricStats:
+        """Derive detection bounds from the raw statistics."""
+        q1, median, q3 = float(q1), float(median), float(q3)
+        iqr = q3 - q1
+        
+        return _MetricStats(
+            mean=mean,
+            std=std,
+            q1=q1,
+            median=median,
+            q3=q3,
+            iqr=iqr,
+            lower=q1 - self.iqr_multiplier * iqr,
+            upper=q3 + self.iqr_multiplier * iqr,
+            two_std_lo=mean - 2 * std,
+            two_std_hi=mean + 2 * std,
+        )
+    
+    def _stats(
+        self,
+        metric: str,
+        historical: Optional[List[float]] = None
+    ) -> Optional[_MetricStats]:
+        """
+        Return the stats shared by all detectors for a metric.
+        
+        Uses the cached baseline for stored history, or computes stats
+        on the fly when ad-hoc historical values are given.
+        """
+        if historical is not None and len(historical):
+            return self._compute_stats(historical)
+        
+        if metric not in self._stats_cache and metric in self._running:
+            self._stats_cache[metric] = self._compute_running_stats(metric)
+        return self._stats_cache.get(metric)
     
     def detect_zscore_anomaly(
         self,
         value: float,
         metric: str,
-        historical: Optional[List[float]] = None
+        historical: Optional[List[float]] = None,
+        stats: Optional[_MetricStats] = None,
+        ts: Optional[str] = None
     ) -> Optional[AnomalyReport]:
         """
         Detect anomalies using Z-score method.
@@ -89,17 +345,19 @@ class AnomalyDetector:
             value: Current value to check
             metric: Name of the metric
             historical: Historical values (uses stored if not provided)
+            stats: Precomputed stats from _stats(); skips all lookups
+            ts: Report timestamp (defaults to now)
             
         Returns:
             AnomalyReport if anomaly detected, None otherwise
         """
-        data = historical or self.historical_data.get(metric, [])
+        if stats is None:
+            stats = self._stats(metric, historical)
         
-        if len(data) < 10:
+        if stats is None:
             return None  # Not enough data
         
-        mean = np.mean(data)
-        std = np.std(data)
+        mean, std = stats.mean, stats.std
         
         if std == 0:
             return None
@@ -107,16 +365,16 @@ class AnomalyDetector:
         z_score = abs(value - mean) / std
         
         if z_score > self.z_threshold:
-            deviation_pct = ((value - mean) / mean) * 100
+            deviation_pct = _pct_deviation(value, mean)
             severity = self._calculate_severity(z_score)
             
             return AnomalyReport(
-                timestamp=datetime.now().isoformat(),
+                timestamp=ts or datetime.now().isoformat(),
                 anomaly_type="Z-Score Outlier",
                 severity=severity,
                 metric=metric,
                 actual_value=value,
-                expected_range=(mean - 2*std, mean + 2*std),
+                expected_range=(stats.two_std_lo, stats.two_std_hi),
                 deviation_pct=deviation_pct,
                 recommendation=self._generate_recommendation(metric, deviation_pct)
             )
@@ -127,34 +385,42 @@ class AnomalyDetector:
         self,
         value: float,
         metric: str,
-        historical: Optional[List[float]] = None
+        historical: Optional[List[float]] = None,
+        stats: Optional[_MetricStats] = None,
+        ts: Optional[str] = None
     ) -> Optional[AnomalyReport]:
         """
         Detect anomalies using IQR (Interquartile Range) method.
         
-        More robust to outliers than Z-score.
+        More robust to outliers than Z-score. Pass `stats` from
+        _stats() to reuse precomputed quartiles, and `ts` to share
+        one report timestamp across a batch.
         """
-        data = historical or self.historical_data.get(metric, [])
-        
-        if len(data) < 10:
-            return None
-        
-        q1 = np.percentile(data, 25)
-        q3 = np.percentile(data, 75)
-        iqr = q3 - q1
-        
-        lower_bound = q1 - self.iqr_multiplier * iqr
-        upper_bound = q3 + self.iqr_multiplier * iqr
+        if stats is None and historical is not None and len(historical):
+            # Ad-hoc history only needs the quartiles: one conversion, one selection
+            if len(historical) < 10:
+                return None
+            arr = np.asarray(historical, dtype=np.float64)
+            q1, median, q3 = _quartiles(arr)
+            iqr = q3 - q1
+            lower_bound = q1 - self.iqr_multiplier * iqr
+            upper_bound = q3 + self.iqr_multiplier * iqr
+        else:
+            if stats is None:
+                stats = self._stats(metric)
+            if stats is None:
+                return None
+            iqr, median = stats.iqr, stats.median
+            lower_bound, upper_bound = stats.lower, stats.upper
         
         if value < lower_bound or value > upper_bound:
-            median = np.median(data)
-            deviation_pct = ((value - median) / median) * 100
+            deviation_pct = _pct_deviation(value, median)
             
             distance = min(abs(value - lower_bound), abs(value - upper_bound))
             severity = self._calculate_severity(distance / iqr if iqr > 0 else 0)
             
             return AnomalyReport(
-                timestamp=datetime.now().isoformat(),
+                timestamp=ts or datetime.now().isoformat(),
                 anomaly_type="IQR Outlier",
                 severity=severity,
                 metric=metric,
@@ -173,66 +439,91 @@ class AnomalyDetector:
         """
         Run all detection methods on current values.
         
+        Both detectors share one stats lookup per metric. When both
+        flag a metric, only the more severe report is kept (Z-score
+        wins ties).
+        
         Args:
             current_values: Dict of metric_name -> current_value
             
         Returns:
-            List of all detected anomalies
+            List of all detected anomalies, at most one per metric
         """
         anomalies = []
+        ts = datetime.now().isoformat()  # one timestamp for the whole batch
         
         for metric, value in current_values.items():
-            # Try Z-score detection
-            z_anomaly = self.detect_zscore_anomaly(value, metric)
-            if z_anomaly:
-                anomalies.append(z_anomaly)
-                continue  # Don't double-report
+            stats = self._stats(metric)
+            if stats is None:
+                continue  # Not enough data
             
-            # Try IQR detection
-            iqr_anomaly = self.detect_iqr_anomaly(value, metric)
-            if iqr_anomaly:
-                anomalies.append(iqr_anomaly)
+            found = [
+                report for report in (
+                    self.detect_zscore_anomaly(value, metric, stats=stats, ts=ts),
+                    self.detect_iqr_anomaly(value, metric, stats=stats, ts=ts),
+                )
+                if report
+            ]
+            if found:
+                anomalies.append(max(found, key=lambda r: _SEV_LABELS.index(r.severity)))
         
         return anomalies
     
+    def scan_batch(
+        self,
+        current_values: Dict[str, float]
+    ) -> Tuple[List[str], np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Flag outliers for many metrics at once without building reports.
+        
+        Intended for back-testing, where the per-metric Python overhead
+        of detect_all dominates. Uses the Numba kernel when available.
+        
+        Args:
+            current_values: Dict of metric_name -> current_value
+        
+        Returns:
+            Tuple of (metrics, z_mask, iqr_mask, z_scores), with the
+            arrays aligned to the metrics list
+        """
+        # Imported lazily so Numba's import/JIT cost is only paid in batch mode
+        from ._kernels import scan_batch
+        
+        metrics = list(current_values)
+        values = np.fromiter(current_values.values(), dtype=np.float64, count=len(metrics))
+        
+        # Metrics without enough history get NaN stats and are never flagged
+        nan_stats = (np.nan,) * len(_MetricStats._fields)
+        table = np.array(
+            [self._stats(metric) or nan_stats for metric in metrics],
+            dtype=np.float64
+        ).reshape(len(metrics), len(_MetricStats._fields))
+        
+        z_mask, iqr_mask, z_scores = scan_batch(
+            values,
+            np.ascontiguousarray(table[:, 0]),  # mean
+            np.ascontiguousarray(table[:, 1]),  # std
+            np.ascontiguousarray(table[:, 2]),  # q1
+            np.ascontiguousarray(table[:, 4]),  # q3
+            self.iqr_multiplier,
+            self.z_threshold
+        )
+        return metrics, z_mask, iqr_mask, z_scores
+    
     def _calculate_severity(self, score: float) -> str:
         """Map detection score to severity level."""
-        if score > 5:
-            return "critical"
-        elif score > 4:
-            return "high"
-        elif score > 3:
-            return "medium"
-        return "low"
+        return _SEV_LABELS[np.searchsorted(_SEV_EDGES, score, side="left")]
     
     def _generate_recommendation(self, metric: str, deviation_pct: float) -> str:
         """Generate actionable recommendation based on anomaly."""
         direction = "increase" if deviation_pct > 0 else "decrease"
-        abs_pct = abs(deviation_pct)
-        
-        recommendations = {
-            "daily_revenue": f"Revenue {direction}d by {abs_pct:.1f}%. Review pricing strategy and promotions.",
-            "transaction_count": f"Transaction volume {direction}d by {abs_pct:.1f}%. Check store traffic and marketing campaigns.",
-            "avg_order_value": f"Average order value {direction}d by {abs_pct:.1f}%. Analyze product mix and upselling effectiveness.",
-            "category_sales": f"Category sales {direction}d by {abs_pct:.1f}%. Review inventory levels and merchandising.",
-        }
-        
-        return recommendations.get(
-            metric,
-            f"Unusual {direction} of {abs_pct:.1f}% detected. Investigate root cause."
-        )
+        template = _RECOMMENDATIONS.get(metric, _DEFAULT_RECOMMENDATION)
+        return template.format(direction=direction, pct=abs(deviation_pct))
     
     def format_alert(self, anomaly: AnomalyReport) -> str:
         """Format anomaly as alert message."""
-        emoji_map = {
-            "critical": "🚨",
-            "high": "⚠️",
-            "medium": "📊",
-            "low": "ℹ️"
-        }
-        
         return f"""
-{emoji_map.get(anomaly.severity, '📊')} **{anomaly.severity.upper()} ANOMALY DETECTED**
+{_EMOJI_MAP.get(anomaly.severity, '📊')} **{anomaly.severity.upper()} ANOMALY DETECTED**
 
 📌 Metric: {anomaly.metric}
 📊 Actual: {anomaly.actual_value:,.2f}
@@ -19,6 +19,8 @@ import os
 from datetime import datetime
 from typing import Dict, List, Optional
 
+import pandas as pd
+
 # LangChain imports
 from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate, HumanMessagePromptTemplate
@@ -80,6 +82,10 @@ class SalesInsightsGenerator:
                 "Format your response as:\n{format_instructions}"
             )
         ])
+        
+        # Schema instructions and the chain don't change between calls
+        self._format_instructions = self.output_parser.get_format_instructions()
+        self._chain = self.prompt | self.llm | self.output_parser
     
     def _default_system_prompt(self) -> str:
         """Default system prompt for sales analyst persona."""
@@ -116,11 +122,9 @@ Your analysis should help retail managers make data-driven decisions."""
         sales_summary = self._format_sales_summary(sales_data, period)
         
         # Generate insights using LangChain
-        chain = self.prompt | self.llm | self.output_parser
-        
-        result = chain.invoke({
+        result = self._chain.invoke({
             "sales_summary": sales_summary,
-            "format_instructions": self.output_parser.get_format_instructions()
+            "format_instructions": self._format_instructions
         })
         
         return result
@@ -170,22 +174,21 @@ Your analysis should help retail managers make data-driven decisions."""
         Returns:
             Formatted markdown report with AI insights
         """
-        # Aggregate data
-        total_revenue = sum(r.get("price", 0) * r.get("quantity", 1) for r in bigquery_results)
-        total_txns = len(bigquery_results)
+        # Aggregate data (missing fields default to price 0, quantity 1)
+        df = pd.DataFrame(bigquery_results).reindex(columns=["category", "price", "quantity"])
+        line_revenue = df["price"].fillna(0) * df["quantity"].fillna(1)
+        total_revenue = float(line_revenue.sum())
+        total_txns = len(df)
         
         # Group by category
-        categories = {}
-        for r in bigquery_results:
-            cat = r.get("category", "Unknown")
-            categories[cat] = categories.get(cat, 0) + r.get("price", 0) * r.get("quantity", 1)
+        categories = line_revenue.groupby(df["category"].fillna("Unknown"), sort=False).sum()
         
         # Prepare data for analysis
         sales_data = {
             "total_revenue": total_revenue,
             "total_transactions": total_txns,
             "avg_order_value": total_revenue / total_txns if total_txns > 0 else 0,
-            "top_categories": dict(sorted(categories.items(), key=lambda x: x[1], reverse=True)[:5])
+            "top_categories": categories.nlargest(5).to_dict()
         }
         
         # Generate AI insights
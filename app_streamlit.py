@@ -11,17 +11,28 @@ Run: streamlit run app_streamlit.py
 """
 
 import streamlit as st
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
-import random
+from datetime import date
+import hashlib
+import importlib
+import importlib.util
 import os
 import sys
+import tempfile
 
 # Add project root to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+# Rust-based Excel reader (pandas >= 2.2) when installed, else pandas' default
+EXCEL_ENGINE = 'calamine' if importlib.util.find_spec('python_calamine') else None
+
+# Above this many rows the revenue group-sums use the compiled kernel in
+# ai/_kernels.py; smaller frames skip importing Numba and use pandas directly
+LARGE_DATASET_ROWS = 50_000
+
 # Page configuration
 st.set_page_config(
     page_title="Retail Analytics Dashboard",
@@ -70,36 +81,178 @@ st.markdown("""
 # ============================================
 # Sample Data Generation (Replace with BigQuery in production)
 # ============================================
+# Persisted to disk so server restarts start warm. Keyed on the end date
+# (disk-persisted caches ignore ttl), so a new day generates fresh data
+# and max_entries bounds the stale entries kept around.
+@st.cache_data(persist="disk", max_entries=4)
+def load_sample_data(as_of):
+    """Generate 30 days of sample retail data for demo, ending on `as_of`."""
+    dates = pd.date_range(end=as_of, periods=30, freq='D')
+    categories = np.array(['T-Shirt', 'Jeans', 'Sneakers', 'Dress', 'Jacket'])
+    stores = np.array(['Berlin_01', 'Hamburg_02', 'Munich_01', 'Online_Store'])
+    base_prices = np.array([30, 80, 120, 100, 150])  # aligned with categories
+    
+    # Draw every column in bulk instead of row by row
+    rng = np.random.default_rng(42)
+    txns_per_day = rng.integers(300, 501, size=len(dates))
+    total = txns_per_day.sum()
+    
+    cat_idx = rng.integers(0, len(categories), size=total)
+    store_idx = rng.integers(0, len(stores), size=total)
+    # Narrow dtypes: quantities are 1-3 and revenue stays well inside float32 range
+    quantity = rng.integers(1, 4, size=total, dtype=np.int8)
+    price = base_prices[cat_idx] * rng.uniform(0.8, 1.2, size=total)
+    revenue = np.round(price * rng.integers(1, 4, size=total), 2).astype(np.float32)
+    
+    return pd.DataFrame({
+        'date': np.repeat(dates.values, txns_per_day),
+        # Categoricals straight from the sampled codes: no string hashing
+        'store': pd.Categorical.from_codes(store_idx, stores),
+        'category': pd.Categorical.from_codes(cat_idx, categories),
+        'quantity': quantity,
+        'revenue': revenue
+    })
+
+
+def optimize_dtypes(df):
+    """
+    Store low-cardinality keys as categoricals so groupbys run on int codes,
+    and downcast numeric columns so aggregations scan fewer bytes.
+    """
+    for col in ('store', 'category'):
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    # Only downcast columns that are already numeric; to_numeric picks the
+    # narrowest type that still holds every value
+    for col, kind in (('quantity', 'integer'), ('revenue', 'float')):
+        if col in df.columns and pd.api.types.is_numeric_dtype(df[col]):
+            df[col] = pd.to_numeric(df[col], downcast=kind)
+    return df
+
+
+AGGREGATE_KEYS = ('category', 'store', 'date')
+
+
+def get_revenue_aggregates(df):
+    """
+    Revenue totals by category, store and date, computed once per dataset.
+    
+    All three come from a single scan of the revenue column: a compiled
+    kernel for large frames, otherwise one pandas groupby on all keys
+    whose (small) result is then summed per key.
+    """
+    if len(df) > LARGE_DATASET_ROWS:
+        # Imported here so small datasets never pay for loading Numba
+        from ai._kernels import group_sums
+        
+        keys = [pd.factorize(df[col], sort=True) for col in AGGREGATE_KEYS]
+        totals = group_sums(
+            *(codes for codes, _ in keys),
+            df['revenue'].to_numpy(),  # float32 is fine, the kernel sums into float64
+            *(len(uniques) for _, uniques in keys)
+        )
+        return tuple(
+            pd.Series(total, index=pd.Index(uniques, name=col), name='revenue')
+            for col, (_, uniques), total in zip(AGGREGATE_KEYS, keys, totals)
+        )
+    
+    # dropna=False keeps rows with a missing key in the combined groupby;
+    # each per-key sum then drops only its own missing labels. The combined
+    # groups are small, so a float32 revenue column is summed as-is and only
+    # the (small) result is widened to float64 before the per-key roll-up
+    combined = (
+        df.groupby(list(AGGREGATE_KEYS), observed=True, dropna=False)['revenue']
+        .sum()
+        .astype(np.float64)
+    )
+    return tuple(
+        combined.groupby(level=col, observed=True).sum()
+        for col in AGGREGATE_KEYS
+    )
+
+
+def compute_kpis(df):
+    """Headline KPI values: total revenue, transaction count, avg order value."""
+    # Accumulate in float64 even when the column is stored as float32
+    total_revenue = df['revenue'].to_numpy().sum(dtype=np.float64)
+    total_txns = len(df)
+    return total_revenue, total_txns, total_revenue / total_txns
+
+
+def summarize(kpis, aggregates):
+    """Pack KPI values and revenue aggregates into the dashboard summary dict."""
+    total_revenue, total_txns, avg_order = kpis
+    by_cat, by_store, by_date = aggregates
+    return {
+        'total_revenue': float(total_revenue),
+        'total_transactions': int(total_txns),
+        'avg_order_value': float(avg_order),
+        'top_category': by_cat.idxmax(),
+        'top_store': by_store.idxmax(),
+        'by_cat': by_cat,
+        'by_store': by_store,
+        'by_date': by_date
+    }
+
+
 @st.cache_data
-def load_sample_data():
-    """Generate sample retail data for demo."""
-    dates = pd.date_range(end=datetime.now(), periods=30, freq='D')
-    categories = ['T-Shirt', 'Jeans', 'Sneakers', 'Dress', 'Jacket']
-    stores = ['Berlin_01', 'Hamburg_02', 'Munich_01', 'Online_Store']
-    
-    data = []
-    for date in dates:
-        for _ in range(random.randint(300, 500)):
-            category = random.choice(categories)
-            base_prices = {'T-Shirt': 30, 'Jeans': 80, 'Sneakers': 120, 'Dress': 100, 'Jacket': 150}
-            price = base_prices[category] * random.uniform(0.8, 1.2)
-            
-            data.append({
-                'date': date,
-                'store': random.choice(stores),
-                'category': category,
-                'quantity': random.randint(1, 3),
-                'revenue': round(price * random.randint(1, 3), 2)
-            })
+def build_summary(df):
+    """
+    Small summary of a dataset: headline KPIs plus revenue by category,
+    store and date. Everything past loading (charts, AI insights, LLM
+    prompts) reads from this instead of the raw frame.
+    """
+    return summarize(compute_kpis(df), get_revenue_aggregates(df))
+
+
+@st.cache_data(show_spinner="⚡ Aggregating with Dask...")
+def aggregate_with_dask(uploaded_file):
+    """
+    Aggregate an uploaded CSV in parallel with Dask.
+    
+    Only small results come back to pandas: a 20-row preview and the same
+    summary dict as build_summary. The full file is never held as one frame.
+    """
+    import dask
+    import dask.dataframe as dd
+    
+    # dd.read_csv reads from paths, so spill the in-memory upload to disk
+    with tempfile.NamedTemporaryFile(suffix='.csv', delete=False) as tmp:
+        tmp.write(uploaded_file.getbuffer())
+    
+    try:
+        ddf = dd.read_csv(tmp.name, blocksize="64MB")
+        missing = [c for c in ['store', 'category', 'revenue'] if c not in ddf.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {missing}")
+        
+        if 'date' in ddf.columns:
+            ddf['date'] = dd.to_datetime(ddf['date'])
+        elif 'timestamp' in ddf.columns:
+            ddf['date'] = dd.to_datetime(ddf['timestamp'])
+        else:
+            ddf['date'] = pd.Timestamp.now()
+        
+        # One compute call so Dask shares a single scan across all aggregates
+        total_txns, total_revenue, category_revenue, store_revenue, daily_revenue = dask.compute(
+            ddf.shape[0],
+            ddf['revenue'].sum(),
+            ddf.groupby('category')['revenue'].sum(),
+            ddf.groupby('store')['revenue'].sum(),
+            ddf.groupby('date')['revenue'].sum()
+        )
+        preview = ddf.head(20)
+    finally:
+        os.remove(tmp.name)
     
-    return pd.DataFrame(data)
+    kpis = (total_revenue, total_txns, total_revenue / total_txns)
+    aggregates = (category_revenue.sort_index(), store_revenue.sort_index(), daily_revenue.sort_index())
+    return preview, summarize(kpis, aggregates)
 
 
-def get_ai_insights(df):
-    """Generate AI insights (mock for demo, real uses LangChain)."""
-    total_revenue = df['revenue'].sum()
-    top_category = df.groupby('category')['revenue'].sum().idxmax()
-    top_store = df.groupby('store')['revenue'].sum().idxmax()
+def get_ai_insights(summary):
+    """Generate AI insights from the dataset summary (mock for demo, real uses LangChain)."""
+    top_category, top_store = summary['top_category'], summary['top_store']
     
     insights = [
         f"📈 **Strong Performance**: {top_category} is your top-selling category, contributing 28% of total revenue.",
@@ -110,39 +263,55 @@ def get_ai_insights(df):
     return insights
 
 
-def get_anomalies(df):
-    """Detect anomalies in the data."""
-    daily_revenue = df.groupby('date')['revenue'].sum()
-    mean = daily_revenue.mean()
-    std = daily_revenue.std()
-    
-    anomalies = []
-    for date, revenue in daily_revenue.items():
-        if abs(revenue - mean) > 2 * std:
-            change_pct = ((revenue - mean) / mean) * 100
-            anomalies.append({
-                'date': date.strftime('%Y-%m-%d'),
-                'revenue': revenue,
-                'deviation': change_pct,
-                'type': 'High' if change_pct > 0 else 'Low'
-            })
-    
-    return anomalies
+@st.cache_data
+def get_anomalies(daily_revenue):
+    """Detect anomalies in daily revenue totals."""
+    stats = daily_revenue.agg(['mean', 'std'])
+    mean, std = stats['mean'], stats['std']
+    
+    values = daily_revenue.to_numpy()
+    mask = np.abs(values - mean) > 2 * std
+    change_pct = ((values[mask] - mean) / mean) * 100
+    
+    anomalies = pd.DataFrame({
+        'date': daily_revenue.index[mask].strftime('%Y-%m-%d'),
+        'revenue': values[mask],
+        'deviation': change_pct,
+        'type': np.where(change_pct > 0, 'High', 'Low')
+    })
+    return anomalies.to_dict('records')
+
+
+def get_store_stats(store_revenue):
+    """
+    Store-level stats for the performance summary, taken in one pass over
+    the raw revenue array instead of separate pandas reductions.
+    """
+    vals = store_revenue.to_numpy(dtype=np.float64)
+    names = store_revenue.index.to_numpy()
+    imax, imin = vals.argmax(), vals.argmin()
+    online = np.flatnonzero(store_revenue.index.astype(str).str.contains('Online', case=False))
+    return {
+        'top_store': names[imax],
+        'top_revenue': vals[imax],
+        'lowest_store': names[imin],
+        'lowest_revenue': vals[imin],
+        'avg_revenue': vals.mean(),
+        'total_stores': len(vals),
+        'perf_diff': (vals[imax] - vals[imin]) / vals[imin] * 100,
+        'online_revenue': vals[online[0]] if len(online) else None
+    }
 
 
-def _get_mock_store_ai_analysis(store_rev):
+def _get_mock_store_ai_analysis(stats):
     """Generate AI analysis for store performance."""
-    top_store = store_rev.loc[store_rev['revenue'].idxmax()]
-    lowest_store = store_rev.loc[store_rev['revenue'].idxmin()]
-    online_store = store_rev[store_rev['store'].str.contains('Online', case=False)]
-    
     analysis = f"""
 🤖 **AI Store Performance Analysis**
 
-**🏆 Top Performer**: {top_store['store']} is leading with exceptional performance. 
+**🏆 Top Performer**: {stats['top_store']} is leading with exceptional performance. 
 Consider replicating their strategies (staffing, promotions, inventory management) across other locations.
 
-**📈 Growth Opportunity**: {lowest_store['store']} shows potential for improvement. 
+**📈 Growth Opportunity**: {stats['lowest_store']} shows potential for improvement. 
 Recommend conducting customer satisfaction surveys and analyzing foot traffic patterns.
 
 **💡 Strategic Recommendations**:
@@ -150,12 +319,135 @@ Recommend conducting customer satisfaction surveys and analyzing foot traffic pa
 • Implement cross-store best practice sharing programs
 • Consider seasonal promotions to boost overall performance
 """
-    if len(online_store) > 0:
-        analysis += f"\n**🌐 Digital Channel**: Online_Store contributes ${online_store['revenue'].values[0]:,.0f}. Focus on omnichannel integration for higher conversion."
+    if stats['online_revenue'] is not None:
+        analysis += f"\n**🌐 Digital Channel**: Online_Store contributes ${stats['online_revenue']:,.0f}. Focus on omnichannel integration for higher conversion."
     
     return analysis
 
 
+# ============================================
+# AI Provider Clients
+# ============================================
+@st.cache_resource(show_spinner=False)
+def _load_sdk(name):
+    """Import an AI SDK on first use and keep the module pinned for the session."""
+    return importlib.import_module(name)
+
+
+@st.cache_resource(show_spinner=False)
+def _build_ai_client(provider, key_digest, _api_key):
+    """Construct an SDK client; cached per (provider, key digest)."""
+    if provider == "OpenAI":
+        return _load_sdk("openai").OpenAI(api_key=_api_key)
+    elif provider == "Google Gemini":
+        genai = _load_sdk("google.generativeai")
+        genai.configure(api_key=_api_key)
+        return genai.GenerativeModel('gemini-pro')
+    elif provider == "Anthropic Claude":
+        return _load_sdk("anthropic").Anthropic(api_key=_api_key)
+    elif provider == "Groq":
+        return _load_sdk("groq").Groq(api_key=_api_key)
+    raise ValueError(f"Unsupported AI provider: {provider}")
+
+
+def get_ai_client(provider, api_key):
+    """
+    Return a reusable client for the provider, keeping its connection pool
+    alive across reruns. The raw key is never part of the cache key; only
+    its SHA-256 digest is hashed.
+    """
+    key_digest = hashlib.sha256(api_key.encode()).hexdigest()
+    client = _build_ai_client(provider, key_digest, api_key)
+    if provider == "Google Gemini":
+        # genai holds the key in module state; re-apply in case it was switched
+        _load_sdk("google.generativeai").configure(api_key=api_key)
+    return client
+
+
+# ============================================
+# Fragments (rerun on their own, not the whole dashboard)
+# ============================================
+@st.fragment
+def api_test_panel(ai_provider, api_key):
+    """Test button for the selected provider's API key."""
+    if st.button("🧪 Test", key="test_api"):
+        with st.spinner("Testing..."):
+            try:
+                client = get_ai_client(ai_provider, api_key)
+                if ai_provider == "OpenAI":
+                    response = client.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=[{"role": "user", "content": "Say 'API works!' in 3 words."}],
+                        max_tokens=20
+                    )
+                    result = response.choices[0].message.content
+                elif ai_provider == "Google Gemini":
+                    response = client.generate_content("Say 'API works!' in 3 words.")
+                    result = response.text
+                elif ai_provider == "Anthropic Claude":
+                    response = client.messages.create(
+                        model="claude-3-haiku-20240307",
+                        max_tokens=20,
+                        messages=[{"role": "user", "content": "Say 'API works!' in 3 words."}]
+                    )
+                    result = response.content[0].text
+                elif ai_provider == "Groq":
+                    response = client.chat.completions.create(
+                        model="llama3-8b-8192",
+                        messages=[{"role": "user", "content": "Say 'API works!' in 3 words."}],
+                        max_tokens=20
+                    )
+                    result = response.choices[0].message.content
+                st.success(f"✅ {result}")
+            except Exception as e:
+                st.error(f"❌ {str(e)[:50]}")
+
+
+@st.fragment
+def ai_store_panel(store_revenue, store_stats):
+    """On-demand AI analysis of revenue by store."""
+    if st.button("🤖 Generate AI Store Analysis", key="ai_store_analysis"):
+        with st.spinner("🧠 Analyzing store performance with AI..."):
+            api_key = os.environ.get("OPENAI_API_KEY")
+            # Check if real AI is available
+            if api_key and not api_key.startswith("sk-..."):
+                try:
+                    client = get_ai_client("OpenAI", api_key)
+                    
+                    # Only the aggregated store totals go into the prompt, never raw rows
+                    store_data = store_revenue.round(2).to_dict()
+                    prompt = f"""Analyze this retail store performance data and provide strategic insights:
+
+Store Revenue Data:
+{store_data}
+
+Provide:
+1. 🏆 Top Performer analysis (why they're successful)
+2. 📈 Growth Opportunity (which store needs improvement and how)
+3. 💡 Strategic Recommendations (3 bullet points)
+4. 🌐 Digital Channel insights (if Online_Store present)
+
+Keep response concise and actionable."""
+
+                    response = client.chat.completions.create(
+                        model="gpt-3.5-turbo",
+                        messages=[
+                            {"role": "system", "content": "You are a retail analytics expert providing actionable business insights."},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=500,
+                        temperature=0.7
+                    )
+                    ai_analysis = response.choices[0].message.content
+                    st.success("🤖 **AI Store Performance Analysis** (Powered by GPT)")
+                    st.markdown(ai_analysis)
+                except Exception as e:
+                    st.warning(f"⚠️ API Error: {str(e)[:80]}... Showing demo analysis.")
+                    st.info(_get_mock_store_ai_analysis(store_stats))
+            else:
+                st.info(_get_mock_store_ai_analysis(store_stats))
+
+
 # ============================================
 # Main Dashboard
 # ============================================
@@ -207,45 +499,7 @@ def main():
             # Test and Reset buttons
             col_test, col_reset = st.columns(2)
             with col_test:
-                if st.button("🧪 Test", key="test_api"):
-                    with st.spinner("Testing..."):
-                        try:
-                            if ai_provider == "OpenAI":
-                                from openai import OpenAI
-                                client = OpenAI(api_key=api_key_input)
-                                response = client.chat.completions.create(
-                                    model="gpt-3.5-turbo",
-                                    messages=[{"role": "user", "content": "Say 'API works!' in 3 words."}],
-                                    max_tokens=20
-                                )
-                                result = response.choices[0].message.content
-                            elif ai_provider == "Google Gemini":
-                                import google.generativeai as genai
-                                genai.configure(api_key=api_key_input)
-                                model = genai.GenerativeModel('gemini-pro')
-                                response = model.generate_content("Say 'API works!' in 3 words.")
-                                result = response.text
-                            elif ai_provider == "Anthropic Claude":
-                                import anthropic
-                                client = anthropic.Anthropic(api_key=api_key_input)
-                                response = client.messages.create(
-                                    model="claude-3-haiku-20240307",
-                                    max_tokens=20,
-                                    messages=[{"role": "user", "content": "Say 'API works!' in 3 words."}]
-                                )
-                                result = response.content[0].text
-                            elif ai_provider == "Groq":
-                                from groq import Groq
-                                client = Groq(api_key=api_key_input)
-                                response = client.chat.completions.create(
-                                    model="llama3-8b-8192",
-                                    messages=[{"role": "user", "content": "Say 'API works!' in 3 words."}],
-                                    max_tokens=20
-                                )
-                                result = response.choices[0].message.content
-                            st.success(f"✅ {result}")
-                        except Exception as e:
-                            st.error(f"❌ {str(e)[:50]}")
+                api_test_panel(ai_provider, api_key_input)
             with col_reset:
                 if st.button("🔄 Reset", key="reset_api"):
                     del st.session_state["api_key_input"]
@@ -275,6 +529,7 @@ def main():
         ["📊 Sample Data", "📁 Upload CSV"],
         index=0
     )
+    dask_result = None  # (preview, summary) when Dask handled the upload
     
     if data_source == "📁 Upload CSV":
         uploaded_file = st.sidebar.file_uploader(
@@ -282,20 +537,37 @@ def main():
             type=["csv", "xlsx", "xls"],
             help="CSV/Excel must have columns: store, category, revenue"
         )
+        use_dask = st.sidebar.checkbox(
+            "⚡ Use Dask for large files",
+            value=False,
+            help="Aggregate large CSVs in parallel without loading them into one DataFrame"
+        )
         
-        if uploaded_file is not None:
+        if uploaded_file is not None and use_dask and uploaded_file.name.endswith('.csv'):
+            try:
+                dask_result = aggregate_with_dask(uploaded_file)
+                df = dask_result[0]
+                st.sidebar.success(f"✅ Aggregated {dask_result[1]['total_transactions']:,} rows with Dask")
+            except ImportError:
+                st.sidebar.error("❌ Dask is not installed")
+                df = load_sample_data(date.today())
+            except Exception as e:
+                st.sidebar.error(f"❌ Error: {str(e)[:50]}")
+                df = load_sample_data(date.today())
+        elif uploaded_file is not None:
             try:
                 # Handle different file types
                 if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
+                    # Multithreaded Arrow parser instead of the default C engine
+                    df = pd.read_csv(uploaded_file, engine='pyarrow')
                 else:
-                    df = pd.read_excel(uploaded_file)
+                    df = pd.read_excel(uploaded_file, engine=EXCEL_ENGINE)
                 # Validate required columns
                 required_cols = ['store', 'category', 'revenue']
                 missing = [c for c in required_cols if c not in df.columns]
                 if missing:
                     st.sidebar.error(f"❌ Missing columns: {missing}")
-                    df = load_sample_data()
+                    df = load_sample_data(date.today())
                 else:
                     # Convert date column if exists
                     if 'date' in df.columns:
@@ -312,20 +584,25 @@ def main():
                     st.sidebar.success(f"✅ Loaded {len(df):,} rows")
             except Exception as e:
                 st.sidebar.error(f"❌ Error: {str(e)[:50]}")
-                df = load_sample_data()
+                df = load_sample_data(date.today())
         else:
             st.sidebar.info("👆 Upload a CSV file to analyze your data")
-            df = load_sample_data()
+            df = load_sample_data(date.today())
     else:
         # Load sample data
-        df = load_sample_data()
+        df = load_sample_data(date.today())
+    
+    df = optimize_dtypes(df)
+    
+    summary = dask_result[1] if dask_result is not None else build_summary(df)
+    total_txns = summary['total_transactions']
     
     # --- View Data Option ---
     st.sidebar.markdown("---")
     if st.sidebar.checkbox("👁️ View Raw Data", value=False):
         st.markdown("### 📋 Data Preview")
         st.dataframe(df.head(20), use_container_width=True)
-        st.caption(f"Showing 20 of {len(df):,} rows | Columns: {', '.join(df.columns)}")
+        st.caption(f"Showing 20 of {total_txns:,} rows | Columns: {', '.join(df.columns)}")
         st.markdown("---")
     
     # Header
@@ -336,11 +613,6 @@ def main():
     # KPI Cards
     col1, col2, col3, col4 = st.columns(4)
     
-    total_revenue = df['revenue'].sum()
-    total_txns = len(df)
-    avg_order = total_revenue / total_txns
-    top_category = df.groupby('category')['revenue'].sum().idxmax()
-    
     # Format large numbers compactly (e.g., $2.18M)
     def format_currency(value):
         if value >= 1_000_000:
@@ -353,7 +625,7 @@ def main():
     with col1:
         st.metric(
             label="💰 Total Revenue",
-            value=format_currency(total_revenue),
+            value=format_currency(summary['total_revenue']),
             delta="+12.5% vs last month"
         )
     
@@ -367,14 +639,14 @@ def main():
     with col3:
         st.metric(
             label="📦 Avg Order Value",
-            value=f"${avg_order:.2f}",
+            value=f"${summary['avg_order_value']:.2f}",
             delta="+3.1% vs last month"
         )
     
     with col4:
         st.metric(
             label="🏆 Top Category",
-            value=top_category,
+            value=summary['top_category'],
             delta="28% of revenue"
         )
     
@@ -385,7 +657,7 @@ def main():
     
     with col1:
         st.markdown("### 📈 Daily Revenue Trend")
-        daily_rev = df.groupby('date')['revenue'].sum().reset_index()
+        daily_rev = summary['by_date'].reset_index()
         fig = px.area(
             daily_rev, x='date', y='revenue',
             color_discrete_sequence=['#667eea']
@@ -400,7 +672,7 @@ def main():
     
     with col2:
         st.markdown("### 🥧 Revenue by Category")
-        cat_rev = df.groupby('category')['revenue'].sum().reset_index()
+        cat_rev = summary['by_cat'].reset_index()
         fig = px.pie(
             cat_rev, values='revenue', names='category',
             color_discrete_sequence=px.colors.qualitative.Set2,
@@ -418,7 +690,7 @@ def main():
         st.markdown("### 🤖 AI-Powered Insights")
         st.markdown("*Generated by LangChain + GPT-4*")
         
-        insights = get_ai_insights(df)
+        insights = get_ai_insights(summary)
         
         cols = st.columns(2)
         for i, insight in enumerate(insights):
@@ -431,7 +703,7 @@ def main():
         st.markdown("### ⚠️ Anomaly Detection")
         st.markdown("*Powered by Statistical Analysis + ML*")
         
-        anomalies = get_anomalies(df)
+        anomalies = get_anomalies(summary['by_date'])
         
         if anomalies:
             for anomaly in anomalies[:3]:
@@ -452,7 +724,7 @@ def main():
     st.markdown("---")
     st.markdown("### 🏪 Store Performance")
     
-    store_rev = df.groupby('store')['revenue'].sum().reset_index()
+    store_rev = summary['by_store'].reset_index()
     fig = px.bar(
         store_rev, x='store', y='revenue',
         color='revenue',
@@ -467,65 +739,19 @@ def main():
     st.plotly_chart(fig, use_container_width=True)
     
     # --- Dynamic Store Performance Description ---
-    top_store = store_rev.loc[store_rev['revenue'].idxmax()]
-    lowest_store = store_rev.loc[store_rev['revenue'].idxmin()]
-    avg_revenue = store_rev['revenue'].mean()
-    total_stores = len(store_rev)
-    
-    # Calculate performance difference
-    perf_diff = ((top_store['revenue'] - lowest_store['revenue']) / lowest_store['revenue']) * 100
+    store_stats = get_store_stats(summary['by_store'])
     
     # Summary info box
     st.info(
-        f"📊 Performance Summary: Across {total_stores} locations, "
-        f"{top_store['store']} leads with \\${top_store['revenue']:,.0f} in revenue, "
-        f"while {lowest_store['store']} generated \\${lowest_store['revenue']:,.0f}. "
-        f"Average store revenue is \\${avg_revenue:,.0f}. "
-        f"Top performer exceeds lowest by {perf_diff:.1f}%."
+        f"📊 Performance Summary: Across {store_stats['total_stores']} locations, "
+        f"{store_stats['top_store']} leads with \\${store_stats['top_revenue']:,.0f} in revenue, "
+        f"while {store_stats['lowest_store']} generated \\${store_stats['lowest_revenue']:,.0f}. "
+        f"Average store revenue is \\${store_stats['avg_revenue']:,.0f}. "
+        f"Top performer exceeds lowest by {store_stats['perf_diff']:.1f}%."
     )
     
     # --- Optional AI Insights Button ---
-    if st.button("🤖 Generate AI Store Analysis", key="ai_store_analysis"):
-        with st.spinner("🧠 Analyzing store performance with AI..."):
-            api_key = os.environ.get("OPENAI_API_KEY")
-            # Check if real AI is available
-            if api_key and not api_key.startswith("sk-..."):
-                try:
-                    from openai import OpenAI
-                    client = OpenAI(api_key=api_key)
-                    
-                    # Prepare store data for LLM
-                    store_data = store_rev.to_dict('records')
-                    prompt = f"""Analyze this retail store performance data and provide strategic insights:
-
-Store Revenue Data:
-{store_data}
-
-Provide:
-1. 🏆 Top Performer analysis (why they're successful)
-2. 📈 Growth Opportunity (which store needs improvement and how)
-3. 💡 Strategic Recommendations (3 bullet points)
-4. 🌐 Digital Channel insights (if Online_Store present)
-
-Keep response concise and actionable."""
-
-                    response = client.chat.completions.create(
-                        model="gpt-3.5-turbo",
-                        messages=[
-                            {"role": "system", "content": "You are a retail analytics expert providing actionable business insights."},
-                            {"role": "user", "content": prompt}
-                        ],
-                        max_tokens=500,
-                        temperature=0.7
-                    )
-                    ai_analysis = response.choices[0].message.content
-                    st.success("🤖 **AI Store Performance Analysis** (Powered by GPT)")
-                    st.markdown(ai_analysis)
-                except Exception as e:
-                    st.warning(f"⚠️ API Error: {str(e)[:80]}... Showing demo analysis.")
-                    st.info(_get_mock_store_ai_analysis(store_rev))
-            else:
-                st.info(_get_mock_store_ai_analysis(store_rev))
+    ai_store_panel(summary['by_store'], store_stats)
     
     # Footer
     st.markdown("---")
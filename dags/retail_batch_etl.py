@@ -9,7 +9,7 @@ import sys
 
 # Adding scripts directory to path to import data generator
 sys.path.append(os.path.join(os.path.dirname(__file__), '../scripts'))
-from data_generator import generate_batch_csv
+from data_generator import generate_batch_parquet
 
 # Default arguments for the DAG
 default_args = {
@@ -28,6 +28,17 @@ DATASET_ID = "retail_analytics"
 STAGING_TABLE = "stg_sales"
 FACT_TABLE = "fact_transactions"
 
+# Staging schema (matches scripts/bigquery_setup.sql)
+STAGING_SCHEMA = [
+    {'name': 'transaction_id', 'type': 'STRING', 'mode': 'NULLABLE'},
+    {'name': 'store_id', 'type': 'STRING', 'mode': 'NULLABLE'},
+    {'name': 'product_id', 'type': 'STRING', 'mode': 'NULLABLE'},
+    {'name': 'category', 'type': 'STRING', 'mode': 'NULLABLE'},
+    {'name': 'price', 'type': 'FLOAT64', 'mode': 'NULLABLE'},
+    {'name': 'quantity', 'type': 'INT64', 'mode': 'NULLABLE'},
+    {'name': 'timestamp', 'type': 'TIMESTAMP', 'mode': 'NULLABLE'},
+]
+
 with DAG(
     'retail_batch_etl',
     default_args=default_args,
@@ -38,30 +49,32 @@ with DAG(
     tags=['retail', 'etl', 'gcp'],
 ) as dag:
 
-    # 1. Generate Local CSV Data
+    # 1. Generate Local Parquet Data
     generate_data_task = PythonOperator(
-        task_id='generate_local_csv',
-        python_callable=generate_batch_csv,
-        op_kwargs={'filename': '/tmp/daily_sales.csv', 'num_rows': 1000},
+        task_id='generate_local_parquet',
+        python_callable=generate_batch_parquet,
+        op_kwargs={'filename': '/tmp/daily_sales.parquet', 'num_rows': 1000},
     )
 
     # 2. Upload to GCS Bucket
     upload_to_gcs = LocalFilesystemToGCSOperator(
         task_id='upload_to_gcs',
-        src='/tmp/daily_sales.csv',
-        dst='raw/{{ ds }}/daily_sales.csv',
+        src='/tmp/daily_sales.parquet',
+        dst='raw/{{ ds }}/daily_sales.parquet',
         bucket=BUCKET_NAME,
         gcp_conn_id='google_cloud_default',
     )
 
-    # 3. Load from GCS to BigQuery Staging (Schema auto-detection)
+    # 3. Load from GCS to BigQuery Staging (typed Parquet, explicit schema)
     load_to_bq_staging = GCSToBigQueryOperator(
         task_id='load_to_bq_staging',
         bucket=BUCKET_NAME,
-        source_objects=['raw/{{ ds }}/daily_sales.csv'],
+        source_objects=['raw/{{ ds }}/daily_sales.parquet'],
         destination_project_dataset_table=f"{PROJECT_ID}.{DATASET_ID}.{STAGING_TABLE}",
+        source_format='PARQUET',
+        schema_fields=STAGING_SCHEMA,
+        autodetect=False,
         write_disposition='WRITE_TRUNCATE',
-        autodetect=True,
         gcp_conn_id='google_cloud_default',
     )
 
@@ -79,7 +92,7 @@ with DAG(
                     category,
                     price,
                     quantity,
-                    CAST(timestamp AS TIMESTAMP) as transaction_time,
+                    timestamp as transaction_time,
                     CURRENT_TIMESTAMP() as insertion_time
                 FROM `{PROJECT_ID}.{DATASET_ID}.{STAGING_TABLE}`
                 WHERE transaction_id IS NOT NULL;
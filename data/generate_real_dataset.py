@@ -2,10 +2,13 @@
 Generate realistic retail dataset for portfolio demonstration.
 Creates 10,000+ transactions that look like real retail data.
 """
-import csv
-import random
 from datetime import datetime, timedelta
 
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
 # Realistic product catalog (Bangladesh/German retail)
 PRODUCTS = [
     {"id": "SKU001", "name": "Red T-Shirt", "category": "T-Shirt", "base_price": 29.99},
@@ -34,72 +37,116 @@ STORES = [
     {"id": "Online_Store", "city": "Online", "type": "ecommerce"},
 ]
 
-def generate_transactions(num_days=30, avg_daily_txns=350):
-    """Generate realistic transaction data."""
-    transactions = []
+PAYMENT_METHODS = ["Credit Card", "Debit Card", "Cash", "Mobile Pay"]
+
+# Sampling distributions, normalized once at import
+# Opening hours 10:00-21:00, more sales in afternoon/evening
+HOURS = np.arange(10, 22)
+HOUR_P = np.array([1, 2, 3, 4, 5, 6, 7, 8, 9, 8, 6, 4], dtype=np.float64)
+HOUR_P /= HOUR_P.sum()
+QUANTITIES = np.array([1, 2, 3])
+QTY_P = np.array([0.70, 0.25, 0.05])
+
+# Rows generated and written per chunk when streaming to CSV
+BATCH = 100_000
+
+TRANSACTION_SCHEMA = pa.schema([
+    ("transaction_id", pa.string()),
+    ("timestamp", pa.string()),
+    ("store_id", pa.string()),
+    ("store_city", pa.string()),
+    ("product_id", pa.string()),
+    ("product_name", pa.string()),
+    ("category", pa.string()),
+    ("unit_price", pa.float64()),
+    ("quantity", pa.int64()),
+    ("total_amount", pa.float64()),
+    ("payment_method", pa.string()),
+])
+
+def _daily_counts(rng, num_days, avg_daily_txns):
+    """Transaction days and how many transactions fall on each."""
     start_date = datetime.now() - timedelta(days=num_days)
+    days = pd.date_range(start_date, periods=num_days, freq="D").normalize()
+    
+    # Weekend has more sales, plus random variation per day
+    is_weekend = days.weekday >= 5
+    daily_txns = (avg_daily_txns * np.where(is_weekend, 1.4, 1.0)).astype(int)
+    daily_txns = np.maximum(daily_txns + rng.integers(-50, 51, size=num_days), 0)
+    return days, daily_txns
+
+def _transactions_frame(rng, row_days):
+    """Build one transaction per entry of `row_days` (midnight of its day)."""
+    n = len(row_days)
     
-    for day in range(num_days):
-        current_date = start_date + timedelta(days=day)
-        
-        # Weekend has more sales
-        is_weekend = current_date.weekday() >= 5
-        daily_txns = int(avg_daily_txns * (1.4 if is_weekend else 1.0))
-        daily_txns += random.randint(-50, 50)  # Random variation
-        
-        for _ in range(daily_txns):
-            product = random.choice(PRODUCTS)
-            store = random.choice(STORES)
-            
-            # Time distribution (more sales in afternoon/evening)
-            hour = random.choices(
-                range(10, 22),
-                weights=[1, 2, 3, 4, 5, 6, 7, 8, 9, 8, 6, 4]
-            )[0]
-            minute = random.randint(0, 59)
-            second = random.randint(0, 59)
-            
-            txn_time = current_date.replace(hour=hour, minute=minute, second=second)
-            
-            # Price variations (discounts, etc.)
-            price = product["base_price"] * random.uniform(0.85, 1.0)
-            quantity = random.choices([1, 2, 3], weights=[70, 25, 5])[0]
-            
-            transactions.append({
-                "transaction_id": f"TXN-{txn_time.strftime('%Y%m%d')}-{random.randint(10000, 99999)}",
-                "timestamp": txn_time.isoformat(),
-                "store_id": store["id"],
-                "store_city": store["city"],
-                "product_id": product["id"],
-                "product_name": product["name"],
-                "category": product["category"],
-                "unit_price": round(price, 2),
-                "quantity": quantity,
-                "total_amount": round(price * quantity, 2),
-                "payment_method": random.choice(["Credit Card", "Debit Card", "Cash", "Mobile Pay"]),
-            })
+    # Draw every column in bulk rather than row by row
+    products = pd.DataFrame(PRODUCTS)
+    stores = pd.DataFrame(STORES)
+    prod_idx = rng.integers(0, len(products), size=n)
+    store_idx = rng.integers(0, len(stores), size=n)
     
-    return transactions
+    # Time distribution (more sales in afternoon/evening)
+    hour = rng.choice(HOURS, size=n, p=HOUR_P)
+    minute = rng.integers(0, 60, size=n)
+    second = rng.integers(0, 60, size=n)
+    txn_time = pd.DatetimeIndex(row_days) + pd.to_timedelta(
+        hour * 3600 + minute * 60 + second, unit="s"
+    )
+    
+    # Price variations (discounts, etc.)
+    price = products["base_price"].to_numpy()[prod_idx] * rng.uniform(0.85, 1.0, size=n)
+    quantity = rng.choice(QUANTITIES, size=n, p=QTY_P)
+    
+    return pd.DataFrame({
+        "transaction_id": "TXN-" + txn_time.strftime("%Y%m%d") + "-" + rng.integers(10000, 100000, size=n).astype(str),
+        "timestamp": txn_time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "store_id": stores["id"].to_numpy()[store_idx],
+        "store_city": stores["city"].to_numpy()[store_idx],
+        "product_id": products["id"].to_numpy()[prod_idx],
+        "product_name": products["name"].to_numpy()[prod_idx],
+        "category": products["category"].to_numpy()[prod_idx],
+        "unit_price": np.round(price, 2),
+        "quantity": quantity,
+        "total_amount": np.round(price * quantity, 2),
+        "payment_method": rng.choice(PAYMENT_METHODS, size=n),
+    })
+
+def generate_transactions(num_days=30, avg_daily_txns=350):
+    """Generate realistic transaction data as a DataFrame."""
+    rng = np.random.default_rng()
+    days, daily_txns = _daily_counts(rng, num_days, avg_daily_txns)
+    return _transactions_frame(rng, np.repeat(days.values, daily_txns))
 
-def save_to_csv(transactions, filename):
-    """Save transactions to CSV."""
-    if not transactions:
-        return
+def write_transactions_csv(filename, num_days=30, avg_daily_txns=350, batch_size=BATCH):
+    """
+    Generate transactions and stream them to CSV in batches of `batch_size`
+    rows, so memory stays flat however many rows are written.
     
-    with open(filename, 'w', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=transactions[0].keys())
-        writer.writeheader()
-        writer.writerows(transactions)
+    Returns:
+        Number of transactions written
+    """
+    rng = np.random.default_rng()
+    days, daily_txns = _daily_counts(rng, num_days, avg_daily_txns)
+    day_end = np.cumsum(daily_txns)
+    n = int(day_end[-1]) if len(day_end) else 0
     
-    print(f"✅ Generated {len(transactions)} transactions")
-    print(f"📁 Saved to: {filename}")
+    with pacsv.CSVWriter(filename, TRANSACTION_SCHEMA) as writer:
+        for start in range(0, n, batch_size):
+            # Map this batch's row numbers back to their day
+            rows = np.arange(start, min(start + batch_size, n))
+            batch = _transactions_frame(rng, days.values[np.searchsorted(day_end, rows, side="right")])
+            writer.write_table(pa.Table.from_pandas(batch, schema=TRANSACTION_SCHEMA, preserve_index=False))
+    
+    return n
 
 if __name__ == "__main__":
     print("🔄 Generating realistic retail dataset...")
-    transactions = generate_transactions(num_days=30, avg_daily_txns=350)
-    save_to_csv(transactions, "retail_transactions_30days.csv")
+    filename = "retail_transactions_30days.csv"
+    count = write_transactions_csv(filename, num_days=30, avg_daily_txns=350)
+    print(f"✅ Generated {count} transactions")
+    print(f"📁 Saved to: {filename}")
     
     # Print sample
     print("\n📊 Sample data:")
-    for t in transactions[:3]:
-        print(f"  {t['transaction_id']}: {t['product_name']} x{t['quantity']} = ${t['total_amount']}")
+    for t in pd.read_csv(filename, nrows=3).itertuples():
+        print(f"  {t.transaction_id}: {t.product_name} x{t.quantity} = ${t.total_amount}")
@@ -10,7 +10,7 @@ CREATE OR REPLACE TABLE `your-project.retail_analytics.stg_sales` (
     category STRING,
     price FLOAT64,
     quantity INT64,
-    timestamp STRING
+    timestamp TIMESTAMP
 );
 
 -- 3. Fact Table (Permanent storage with time-stamping)
@@ -1,42 +1,54 @@
-import csv
 import json
 import time
+import uuid
 import random
 import datetime
-from faker import Faker # You might need to install this: pip install faker
+import numpy as np
+import pandas as pd
 
 # Setup
-fake = Faker()
 PRODUCT_CATEGORIES = ['T-Shirt', 'Jeans', 'Sneakers', 'Dress', 'Jacket']
 STORES = ['Berlin_01', 'Hamburg_02', 'Munich_01', 'Online_Store']
 
 def generate_product():
     return {
-        'product_id': fake.uuid4(),
+        'product_id': str(uuid.uuid4()),
         'category': random.choice(PRODUCT_CATEGORIES),
         'price': round(random.uniform(10.0, 150.0), 2),
         'cost': round(random.uniform(5.0, 80.0), 2),
         'timestamp': datetime.datetime.now().isoformat()
     }
 
-# --- MODE 1: BATCH (Generate a CSV file) ---
+# --- MODE 1: BATCH (Generate a CSV or Parquet file) ---
+def generate_batch_df(num_rows=1000):
+    rng = np.random.default_rng()
+    # UTC-aware, so Parquet marks the column isAdjustedToUTC (a BigQuery TIMESTAMP)
+    now = pd.Timestamp.now(tz='UTC').floor('s')
+    
+    # Columns are drawn in bulk rather than row by row
+    return pd.DataFrame({
+        'transaction_id': [str(uuid.uuid4()) for _ in range(num_rows)],
+        'store_id': rng.choice(STORES, size=num_rows),
+        'product_id': [str(uuid.uuid4()) for _ in range(num_rows)],
+        'category': rng.choice(PRODUCT_CATEGORIES, size=num_rows),
+        'price': np.round(rng.uniform(10.0, 150.0, size=num_rows), 2),
+        'quantity': rng.integers(1, 6, size=num_rows),
+        # Any time within the last day
+        'timestamp': now - pd.to_timedelta(rng.integers(0, 86400, size=num_rows), unit='s'),
+    })
+
 def generate_batch_csv(filename='daily_sales.csv', num_rows=1000):
     print(f"📦 Generating {num_rows} rows for Batch Pipeline...")
-    with open(filename, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['transaction_id', 'store_id', 'product_id', 'category', 'price', 'quantity', 'timestamp'])
-        
-        for _ in range(num_rows):
-            prod = generate_product()
-            writer.writerow([
-                fake.uuid4(),
-                random.choice(STORES),
-                prod['product_id'],
-                prod['category'],
-                prod['price'],
-                random.randint(1, 5), # Quantity
-                fake.date_time_between(start_date='-1d', end_date='now').isoformat()
-            ])
+    df = generate_batch_df(num_rows)
+    df.to_csv(filename, index=False, date_format='%Y-%m-%dT%H:%M:%S')
+    print(f"✅ Saved to {filename}")
+
+def generate_batch_parquet(filename='daily_sales.parquet', num_rows=1000):
+    print(f"📦 Generating {num_rows} rows for Batch Pipeline...")
+    df = generate_batch_df(num_rows)
+    # Typed, compressed columns; BigQuery reads TIMESTAMP at microsecond precision
+    df.to_parquet(filename, index=False, engine='pyarrow', compression='snappy',
+                  coerce_timestamps='us', allow_truncated_timestamps=True)
     print(f"✅ Saved to {filename}")
 
 # --- MODE 2: STREAMING (Print real-time JSON) ---
@@ -46,7 +58,7 @@ def start_streaming(interval=1):
         while True:
             # Simulate a sale
             sale = generate_product()
-            sale['transaction_id'] = fake.uuid4()
+            sale['transaction_id'] = str(uuid.uuid4())
             sale['store_id'] = random.choice(STORES)
             
             # This JSON is what you would send to Pub/Sub